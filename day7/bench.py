@@ -0,0 +1,201 @@
+# /// script
+# dependencies = [
+#   "numpy",
+#   "pytest",
+# ]
+# ///
+"""Timings for day7. Run with `uv run bench.py` from this directory.
+
+Each run appends one JSON line per case to `bench_results.jsonl`, tagged with
+the current commit, so timings can be compared across commits.
+"""
+
+import argparse
+import json
+import random
+import subprocess
+import time
+from collections.abc import Callable, Sequence
+from timeit import repeat
+
+from solution import (
+    PART1_PLAN,
+    PART2_PLAN,
+    Equation,
+    EquationStore,
+    Plan,
+    _unconcat,
+    clear_memo,
+    iter_equations,
+    possible_batch,
+)
+
+INT64_MAX = 2**63 - 1
+
+
+def _strip_str(test_value: int, operand: int) -> int | None:
+    # The string-based check `_possible` used before going integer-only.
+    test_str, last_str = str(test_value), str(operand)
+    if test_str.endswith(last_str):
+        next_value_as_str = test_str[: -len(last_str)]
+        if next_value_as_str:
+            return int(next_value_as_str)
+    return None
+
+
+def bench_concat(path: str = "input", number: int = 20) -> None:
+    """Compare string concat stripping with `_unconcat` over every operand."""
+    with open(path) as f:
+        pairs = [(e.test_value, o) for e in iter_equations(f) for o in e.operands]
+    # Only a target equal to the operand tells them apart: `_unconcat` leaves
+    # a zero prefix, since 0 || x == x, where the string has nothing left.
+    comparable = [(t, o) for t, o in pairs if t != o]
+    assert [_strip_str(t, o) for t, o in comparable] == [
+        _unconcat(t, o) for t, o in comparable
+    ]
+
+    for name, fn in (("str", _strip_str), ("int", _unconcat)):
+        best = min(
+            repeat(lambda: [fn(t, o) for t, o in pairs], number=number, repeat=5)
+        )
+        per_call_ns = best / number / len(pairs) * 1e9
+        print(f"concat {name}: {per_call_ns:.1f} ns/check over {len(pairs)} operands")
+
+
+def synthetic_lines(
+    count: int,
+    operand_count: int,
+    max_operand: int,
+    seed: int = 0,
+    plan: Plan = PART2_PLAN,
+) -> list[str]:
+    """Random equations in the `input` format, about half of them solvable.
+
+    Solvable lines fold random operators from `plan` over their operands; the
+    rest get a nearby test value that usually isn't reachable. Lines whose test
+    value wouldn't fit in an int64 are redrawn.
+    """
+    rng = random.Random(seed)
+    lines = []
+    while len(lines) < count:
+        operands = [rng.randint(1, max_operand) for _ in range(operand_count)]
+        test_value = operands[0]
+        for operand in operands[1:]:
+            test_value = rng.choice(plan.operators).apply(test_value, operand)
+        if rng.random() < 0.5:
+            test_value += rng.randint(1, max_operand)
+        if test_value > INT64_MAX:
+            continue
+        lines.append(f"{test_value}: {' '.join(map(str, operands))}")
+    return lines
+
+
+def _serial(lines: Sequence[str], plan: Plan) -> tuple[float, float, int]:
+    start = time.perf_counter()
+    equations = [Equation.from_str(line) for line in lines]
+    parsed = time.perf_counter()
+    clear_memo()
+    total = sum(e.test_value for e in equations if e.possible_with(plan))
+    return parsed - start, time.perf_counter() - parsed, total
+
+
+def _store(lines: Sequence[str], plan: Plan) -> tuple[float, float, int]:
+    start = time.perf_counter()
+    store = EquationStore.from_lines(lines)
+    parsed = time.perf_counter()
+    total = store.total(plan)
+    return parsed - start, time.perf_counter() - parsed, total
+
+
+def _batch(lines: Sequence[str], plan: Plan) -> tuple[float, float, int]:
+    start = time.perf_counter()
+    equations = [Equation.from_str(line) for line in lines]
+    parsed = time.perf_counter()
+    result = possible_batch(equations, concat_operator=plan is PART2_PLAN)
+    total = sum(e.test_value for e, ok in zip(equations, result) if ok)
+    return parsed - start, time.perf_counter() - parsed, total
+
+
+ENGINES: dict[str, Callable[[Sequence[str], Plan], tuple[float, float, int]]] = {
+    "serial": _serial,
+    "store": _store,
+    "batch": _batch,
+}
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(
+    cases: dict[str, Sequence[str]], engines: Sequence[str], results: str | None
+) -> list[dict]:
+    commit, rows = _commit(), []
+    for case, lines in cases.items():
+        for part, plan in (("part1", PART1_PLAN), ("part2", PART2_PLAN)):
+            totals = set()
+            for engine in engines:
+                parse_s, solve_s, total = ENGINES[engine](lines, plan)
+                totals.add(total)
+                row = {
+                    "commit": commit,
+                    "time": time.time(),
+                    "case": case,
+                    "part": part,
+                    "engine": engine,
+                    "equations": len(lines),
+                    "parse_s": parse_s,
+                    "solve_s": solve_s,
+                    "solve_eq_per_s": len(lines) / solve_s if solve_s else None,
+                }
+                rows.append(row)
+                print(
+                    f"{case:>10} {part} {engine:>6}: parse {parse_s:8.4f}s "
+                    f"solve {solve_s:8.4f}s "
+                    f"({len(lines) / max(solve_s, 1e-9):,.0f} eq/s)"
+                )
+            assert len(totals) == 1, (case, part, totals)
+
+    if results:
+        with open(results, "a") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=20_000)
+    parser.add_argument("--operands", type=int, default=8)
+    parser.add_argument("--max-operand", type=int, default=99)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--engine", action="append", choices=sorted(ENGINES), dest="engines"
+    )
+    parser.add_argument("--results", default="bench_results.jsonl")
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--concat", action="store_true", help="only bench_concat")
+    args = parser.parse_args()
+
+    if args.concat:
+        bench_concat()
+        return
+
+    with open("input") as f:
+        cases = {"input": [line for line in f if line.strip()]}
+    cases["synthetic"] = synthetic_lines(
+        args.count, args.operands, args.max_operand, args.seed
+    )
+    run(cases, args.engines or list(ENGINES), None if args.no_save else args.results)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,22 @@
-from dataclasses import dataclass
-from typing import Self
+# /// script
+# dependencies = [
+#   "numpy",
+#   "pytest",
+# ]
+# ///
+import io
+from array import array
+import operator
+import random
+import sys
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import NamedTuple, Self, TextIO
+import numpy as np
 import pytest
-from functools import cache
+from functools import cache, lru_cache, partial
+from itertools import islice, product
 
 example = """
 190: 10 19
@@ -16,39 +31,324 @@ example = """
 """.strip()
 
 
+def _concat_modulus(operand: int) -> int:
+    """The power of ten that `operand` occupies when concatenated."""
+    # Operands are short, so counting up beats a table lookup; zero still takes
+    # up a digit.
+    modulus = 10
+    while modulus <= operand:
+        modulus *= 10
+    return modulus
+
+
+class _Anything:
+    def __repr__(self) -> str:
+        return "ANYTHING"
+
+
+# What an inverse returns when every left-hand operand gives the result, as
+# with 0 * 0 == x * 0. Whatever the earlier operands make, the rest follows.
+ANYTHING = _Anything()
+
+
+def _unadd(test_value: int, operand: int) -> int | None:
+    return test_value - operand
+
+
+def _unmultiply(test_value: int, operand: int) -> int | _Anything | None:
+    if not operand:
+        return ANYTHING if test_value == 0 else None
+    divresult, rem = divmod(test_value, operand)
+    return divresult if rem == 0 else None
+
+
+def _concat(left: int, right: int) -> int:
+    # As with strings, so -3 || 5 == -35.
+    if right < 0:
+        raise ValueError("Can't concatenate a negative operand: %d" % right)
+    if left < 0:
+        return -(-left * _concat_modulus(right) + right)
+    return left * _concat_modulus(right) + right
+
+
+def _unconcat(test_value: int, operand: int) -> int | None:
+    if operand < 0:
+        return None
+    prefix, suffix = divmod(abs(test_value), _concat_modulus(operand))
+    if suffix != operand:
+        return None
+    if test_value < 0:
+        # -0 || x is just x, so a negative target needs digits left over.
+        return -prefix if prefix else None
+    # A zero prefix is only reachable with zero operands, where 0 || x == x.
+    return prefix
+
+
+def _unsubtract(test_value: int, operand: int) -> int | None:
+    return test_value + operand
+
+
+def _unxor(test_value: int, operand: int) -> int | None:
+    return test_value ^ operand
+
+
+@dataclass(frozen=True)
+class Operator:
+    symbol: str
+    apply: Callable[[int, int], int]
+    # Given a result and the right-hand operand, the left-hand operand that
+    # produced it, ANYTHING if every value would have, or None if none could.
+    inverse: Callable[[int, int], int | _Anything | None]
+    # Whether non-negative inputs give a non-negative result that is no smaller
+    # than the left-hand operand unless the right-hand one is zero. If every
+    # operator in a plan is monotonic, searches can discard negative targets
+    # and, without zero operands, values that overshoot the target. Off unless
+    # an operator claims it, since a wrong claim prunes real answers.
+    monotonic: bool = False
+
+
+OPERATORS: dict[str, Operator] = {}
+
+
+def register_operator(op: Operator) -> None:
+    OPERATORS[op.symbol] = op
+
+
+for _op in (
+    Operator("+", operator.add, _unadd, monotonic=True),
+    Operator("*", operator.mul, _unmultiply, monotonic=True),
+    Operator("||", _concat, _unconcat, monotonic=True),
+    Operator("-", operator.sub, _unsubtract),
+    Operator("^", operator.xor, _unxor),
+):
+    register_operator(_op)
+
+
+# Compared and hashed by identity: plans are compiled once per operator set and
+# used as part of every memo key, so hashing should not walk their fields.
+@dataclass(frozen=True, eq=False)
+class Plan:
+    operators: tuple[Operator, ...]
+    symbols: tuple[str, ...]
+    inverses: tuple[Callable[[int, int], int | _Anything | None], ...]
+    prune_negative: bool
+    # Operand count at which to switch to meeting in the middle; None to never.
+    mitm_threshold: int | None
+
+    def possible(self, test_value: int, operands: tuple[int, ...]) -> bool:
+        return self.explain(test_value, operands) is not None
+
+    def explain(
+        self, test_value: int, operands: tuple[int, ...]
+    ) -> tuple[str, ...] | None:
+        """One way to reach the test value as operator symbols, left to right."""
+        if self.mitm_threshold is not None and len(operands) >= self.mitm_threshold:
+            return _meet_in_the_middle(self, test_value, operands)
+        return _search(self, test_value, operands)
+
+    def solutions(
+        self, test_value: int, operands: tuple[int, ...]
+    ) -> Iterator[tuple[str, ...]]:
+        """Every way to reach the test value, as in `explain`."""
+        return _solutions(self, test_value, operands)
+
+
+# Depth-first search is fine for the line lengths in `input`, but the number of
+# paths grows as len(operators) ** len(operands).
+MITM_THRESHOLD = 20
+
+
 @cache
-def _possible(
-    test_value: int, operands: tuple[int, ...], concat_operator: bool = False
-) -> bool:
+def compile_plan(
+    symbols: tuple[str, ...], mitm_threshold: int | None = MITM_THRESHOLD
+) -> Plan:
+    """Build the search plan for an operator set, once per set."""
+    try:
+        operators = tuple(OPERATORS[symbol] for symbol in symbols)
+    except KeyError as e:
+        raise ValueError("unknown operator %s" % e.args[0]) from None
+    return Plan(
+        operators=operators,
+        symbols=tuple(op.symbol for op in operators),
+        inverses=tuple(op.inverse for op in operators),
+        prune_negative=all(op.monotonic for op in operators),
+        mitm_threshold=mitm_threshold,
+    )
+
+
+PART1_PLAN = compile_plan(("+", "*"))
+PART2_PLAN = compile_plan(("+", "*", "||"))
+
+
+# Upper bound on memoized `_search` results. Every entry pins an operand
+# tuple, so an unbounded memo grows for as long as the process keeps solving.
+MEMO_SIZE = 1 << 16
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def _search(
+    plan: Plan, test_value: int, operands: tuple[int, ...]
+) -> tuple[str, ...] | None:
+    """The operators that reach `test_value` from `operands`, or None.
+
+    Only successful paths build a result, so failing branches cost the same as
+    a plain yes/no search.
+    """
     # Did we bottom out?
     if not operands:
-        return True
-    if test_value < 0:
-        return False
+        return ()
+    if test_value < 0 and plan.prune_negative:
+        return None
     # Did we calculate the number?
     if len(operands) == 1:
-        return operands[0] == test_value
+        return () if operands[0] == test_value else None
 
-    # Otherwise, recurse.
-    front = operands[:-1]
-    children = [Equation(test_value - operands[-1], front)]
-    divresult, rem = divmod(test_value, operands[-1])
-    if rem == 0:
-        children.append(Equation(test_value=divresult, operands=front))
+    # Otherwise, undo each operator on the last operand and recurse.
+    front, last = operands[:-1], operands[-1]
+    for symbol, inverse in zip(plan.symbols, plan.inverses):
+        child = inverse(test_value, last)
+        if child is ANYTHING:
+            return (plan.symbols[0],) * (len(front) - 1) + (symbol,)
+        if child is not None and (found := _search(plan, child, front)) is not None:
+            return found + (symbol,)
+    return None
 
-    if concat_operator:
-        test_str, last_str = str(test_value), str(operands[-1])
-        if test_str.endswith(last_str):
-            next_value_as_str = test_str[: -len(last_str)]
-            if next_value_as_str:
-                children.append(
-                    Equation(test_value=int(next_value_as_str), operands=front)
-                )
 
-    for child in children:
-        if child.possible_part2 if concat_operator else child.possible_part1:
-            return True
-    return False
+def _solutions(
+    plan: Plan, test_value: int, operands: tuple[int, ...]
+) -> Iterator[tuple[str, ...]]:
+    if len(operands) <= 1:
+        if (found := _search(plan, test_value, operands)) is not None:
+            yield found
+        return
+
+    front, last = operands[:-1], operands[-1]
+    for symbol, inverse in zip(plan.symbols, plan.inverses):
+        child = inverse(test_value, last)
+        if child is ANYTHING:
+            for prefix in product(plan.symbols, repeat=len(front) - 1):
+                yield prefix + (symbol,)
+        # The memo tells us which branches are dead without walking them.
+        elif child is not None and _search(plan, child, front) is not None:
+            for found in _solutions(plan, child, front):
+                yield found + (symbol,)
+
+
+def _meet_in_the_middle(
+    plan: Plan, test_value: int, operands: tuple[int, ...]
+) -> tuple[str, ...] | None:
+    """Search from both ends and see whether the halves share a value.
+
+    The front half is evaluated forward into the values it can produce; the
+    back half is undone from the test value into the values the front half
+    would have to produce. That's two searches of half the depth rather than
+    one of the full depth. Only the values at each depth are kept; the
+    operators for `Plan.explain` are recovered from them after a match.
+    """
+    if not operands:
+        return ()
+    mid = len(operands) // 2
+    prune_negative = plan.prune_negative
+    prune_overshoot = prune_negative and 0 not in operands
+
+    # forward[i] holds what operands[: i + 1] can produce.
+    forward = [{operands[0]}]
+    for operand in operands[1:mid]:
+        values = {op.apply(v, operand) for v in forward[-1] for op in plan.operators}
+        if prune_overshoot:
+            values = {v for v in values if v <= test_value}
+        forward.append(values)
+
+    # backward[j] holds what the operands before the last j must produce.
+    backward = [{test_value}]
+    for k in range(len(operands) - 1, max(mid, 1) - 1, -1):
+        children = set()
+        for target in backward[-1]:
+            for symbol, inverse in zip(plan.symbols, plan.inverses):
+                child = inverse(target, operands[k])
+                if child is ANYTHING:
+                    # Whatever operands[:k] make will do.
+                    return (
+                        (plan.symbols[0],) * (k - 1)
+                        + (symbol,)
+                        + _backward_path(plan, operands, backward, target)
+                    )
+                if child is not None and not (prune_negative and child < 0):
+                    children.add(child)
+        backward.append(children)
+
+    for value in forward[-1]:
+        if value in backward[-1]:
+            return _forward_path(plan, operands, forward, value) + _backward_path(
+                plan, operands, backward, value
+            )
+    return None
+
+
+def _forward_path(
+    plan: Plan, operands: tuple[int, ...], forward: list[set[int]], value: int
+) -> tuple[str, ...]:
+    """The operators that take operands[0] to `value` through `forward`."""
+    path = []
+    for i in range(len(forward) - 1, 0, -1):
+        value, symbol = next(
+            (left, op.symbol)
+            for left in forward[i - 1]
+            for op in plan.operators
+            if op.apply(left, operands[i]) == value
+        )
+        path.append(symbol)
+    return tuple(reversed(path))
+
+
+def _backward_path(
+    plan: Plan, operands: tuple[int, ...], backward: list[set[int]], value: int
+) -> tuple[str, ...]:
+    """The operators that take `value` to the test value through `backward`."""
+    path = []
+    for j in range(len(backward) - 1, 0, -1):
+        operand = operands[len(operands) - j]
+        value, symbol = next(
+            (target, symbol)
+            for target in backward[j - 1]
+            for symbol, inverse in zip(plan.symbols, plan.inverses)
+            if inverse(target, operand) == value
+        )
+        path.append(symbol)
+    return tuple(path)
+
+
+def _possible(
+    test_value: int, operands: tuple[int, ...], concat_operator: bool = False
+) -> bool:
+    return (PART2_PLAN if concat_operator else PART1_PLAN).possible(
+        test_value, operands
+    )
+
+
+def set_memo_size(maxsize: int | None) -> None:
+    """Replace the `_search` memo with an LRU of `maxsize` entries.
+
+    `None` makes the memo unbounded; 0 disables it.
+    """
+    global _search
+    _search = lru_cache(maxsize=maxsize)(_search.__wrapped__)
+
+
+class MemoInfo(NamedTuple):
+    # The same fields as `functools.lru_cache`'s `cache_info()`.
+    hits: int
+    misses: int
+    maxsize: int | None
+    currsize: int
+
+
+def memo_info() -> MemoInfo:
+    return MemoInfo(*_search.cache_info())
+
+
+def clear_memo() -> None:
+    _search.cache_clear()
 
 
 @dataclass(frozen=True)
@@ -70,6 +370,261 @@ class Equation:
     def possible_part2(self) -> bool:
         return _possible(self.test_value, self.operands, concat_operator=True)
 
+    def possible_with(self, plan: Plan) -> bool:
+        return plan.possible(self.test_value, self.operands)
+
+    def explain(self, plan: Plan = PART2_PLAN) -> tuple[str, ...] | None:
+        return plan.explain(self.test_value, self.operands)
+
+    def solutions(self, plan: Plan = PART2_PLAN) -> Iterator[tuple[str, ...]]:
+        return plan.solutions(self.test_value, self.operands)
+
+    def evaluate(self, symbols: Sequence[str]) -> int:
+        """Apply `symbols` left to right over the operands."""
+        if len(symbols) != len(self.operands) - 1:
+            raise ValueError(
+                "need %d operators; got %d" % (len(self.operands) - 1, len(symbols))
+            )
+        value = self.operands[0]
+        for symbol, operand in zip(symbols, self.operands[1:]):
+            value = OPERATORS[symbol].apply(value, operand)
+        return value
+
+
+@dataclass
+class EquationStore:
+    """Many equations packed into flat int64 arrays.
+
+    Equation `i` has test value `test_values[i]` and operands
+    `operands[offsets[i] : offsets[i] + lengths[i]]`.
+    """
+
+    test_values: array = field(default_factory=lambda: array("q"))
+    operands: array = field(default_factory=lambda: array("q"))
+    offsets: array = field(default_factory=lambda: array("q"))
+    lengths: array = field(default_factory=lambda: array("q"))
+
+    @classmethod
+    def from_lines(cls: type[Self], lines: Iterable[str]) -> Self:
+        store = cls()
+        for line in lines:
+            if line.strip():
+                test_value, operands = line.split(":")
+                store.append(int(test_value), map(int, operands.split()))
+        return store
+
+    @classmethod
+    def from_equations(cls: type[Self], equations: Iterable[Equation]) -> Self:
+        store = cls()
+        for e in equations:
+            store.append(e.test_value, e.operands)
+        return store
+
+    def append(self, test_value: int, operands: Iterable[int]) -> None:
+        start = len(self.operands)
+        self.operands.extend(operands)
+        self.test_values.append(test_value)
+        self.offsets.append(start)
+        self.lengths.append(len(self.operands) - start)
+
+    def __len__(self) -> int:
+        return len(self.test_values)
+
+    def __getitem__(self, index: int) -> Equation:
+        start = self.offsets[index]
+        return Equation(
+            test_value=self.test_values[index],
+            operands=tuple(self.operands[start : start + self.lengths[index]]),
+        )
+
+    def possible(self, index: int, plan: Plan = PART1_PLAN) -> bool:
+        """Reverse search over (target, depth) pairs instead of Equations."""
+        start, length = self.offsets[index], self.lengths[index]
+        if not length:
+            return True
+        if plan.mitm_threshold is not None and length >= plan.mitm_threshold:
+            return (
+                _meet_in_the_middle(
+                    plan,
+                    self.test_values[index],
+                    tuple(self.operands[start : start + length]),
+                )
+                is not None
+            )
+
+        operands, inverses = self.operands, plan.inverses
+        prune_negative = plan.prune_negative
+        first = operands[start]
+        # Pending targets, and the depth of the operand to undo next for each.
+        targets, depths = [self.test_values[index]], [length - 1]
+        while targets:
+            target, depth = targets.pop(), depths.pop()
+            if target < 0 and prune_negative:
+                continue
+            if not depth:
+                if target == first:
+                    return True
+                continue
+            operand = operands[start + depth]
+            for inverse in inverses:
+                child = inverse(target, operand)
+                if child is ANYTHING:
+                    return True
+                if child is not None:
+                    targets.append(child)
+                    depths.append(depth - 1)
+        return False
+
+    def total(self, plan: Plan = PART1_PLAN) -> int:
+        return sum(
+            self.test_values[i] for i in range(len(self)) if self.possible(i, plan)
+        )
+
+
+def iter_equations(f: TextIO) -> Iterator[Equation]:
+    """Lazily parse one equation per non-blank line of `f`."""
+    for line in f:
+        if line.strip():
+            yield Equation.from_str(line)
+
+
+def running_totals(equations: Iterable[Equation]) -> Iterator[tuple[int, int]]:
+    """Yield the part 1 and part 2 totals so far after each equation."""
+    part1 = part2 = 0
+    for e in equations:
+        # Anything possible without concatenation is possible with it.
+        if e.possible_part1:
+            part1 += e.test_value
+            part2 += e.test_value
+        elif e.possible_part2:
+            part2 += e.test_value
+        yield part1, part2
+
+
+def _chunk_total(chunk: Sequence[Equation], concat_operator: bool) -> int:
+    if concat_operator:
+        return sum(e.test_value for e in chunk if e.possible_part2)
+    return sum(e.test_value for e in chunk if e.possible_part1)
+
+
+def _chunks(equations: Sequence[Equation], size: int) -> Iterator[tuple[Equation, ...]]:
+    it = iter(equations)
+    while chunk := tuple(islice(it, size)):
+        yield chunk
+
+
+def parallel_total(
+    equations: Sequence[Equation],
+    concat_operator: bool = False,
+    chunk_size: int = 1024,
+    max_workers: int | None = None,
+) -> int:
+    """Sum the test values of possible equations across a process pool.
+
+    `max_workers` is passed straight to `ProcessPoolExecutor`, so `None` means
+    one worker per CPU.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive; got %s" % chunk_size)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return sum(
+            pool.map(
+                partial(_chunk_total, concat_operator=concat_operator),
+                _chunks(equations, chunk_size),
+            )
+        )
+
+
+# Powers of ten that fit in an int64; used to find the modulus that strips an
+# operand's digits off the end of a target.
+POW10 = 10 ** np.arange(19, dtype=np.int64)
+
+
+def possible_batch(
+    equations: Sequence[Equation], concat_operator: bool = False
+) -> np.ndarray:
+    """Run the reverse search for every equation at once.
+
+    Each round peels one operand off the end of every live candidate, so a
+    round is a handful of array operations rather than one Python call per
+    node. Returns a boolean array parallel to `equations`.
+    """
+    n = len(equations)
+    lengths = np.fromiter((len(e.operands) for e in equations), np.int64, count=n)
+    width = int(lengths.max(initial=0))
+
+    # Operands reversed and left-aligned, so column k holds the k-th operand
+    # from the end of each equation.
+    reversed_operands = np.zeros((n, width), dtype=np.int64)
+    for i, e in enumerate(equations):
+        reversed_operands[i, : len(e.operands)] = e.operands[::-1]
+
+    result = lengths == 0
+    eq = np.flatnonzero(~result)
+    target = np.fromiter((e.test_value for e in equations), np.int64, count=n)[eq]
+
+    for k in range(width):
+        if not eq.size:
+            break
+        ops = reversed_operands[eq, k]
+
+        # Did we calculate the number?
+        last = lengths[eq] == k + 1
+        result[eq[last & (target == ops)]] = True
+
+        # x * 0 == 0, so a zero target over a zero operand is met whatever the
+        # operands before it make.
+        result[eq[~last & (target == 0) & (ops == 0)]] = True
+
+        # Otherwise, expand candidates for equations that are still unsolved.
+        keep = ~last & ~result[eq]
+        eq, target, ops = eq[keep], target[keep], ops[keep]
+
+        child_eq, child_target = [eq], [target - ops]
+
+        safe_ops = np.where(ops == 0, 1, ops)
+        divisible = (ops != 0) & (target % safe_ops == 0)
+        child_eq.append(eq[divisible])
+        child_target.append(target[divisible] // ops[divisible])
+
+        if concat_operator:
+            # Zero still occupies one digit.
+            digits = np.searchsorted(POW10, np.maximum(ops, 1), side="right")
+            # A 19-digit operand's modulus doesn't fit in an int64, but the only
+            # int64 ending in it is the operand itself, leaving a zero prefix.
+            wide = digits == len(POW10)
+            modulus = POW10[np.minimum(digits, len(POW10) - 1)]
+            suffix = np.where(wide, target == ops, target % modulus == ops)
+            child_eq.append(eq[suffix])
+            child_target.append(np.where(wide, 0, target // modulus)[suffix])
+
+        eq, target = np.concatenate(child_eq), np.concatenate(child_target)
+        nonnegative = target >= 0
+        eq, target = eq[nonnegative], target[nonnegative]
+
+        # Different branches often land on the same intermediate value. Sorting
+        # the two columns directly beats np.unique(axis=0), which sorts rows
+        # as opaque records.
+        if eq.size:
+            order = np.lexsort((target, eq))
+            eq, target = eq[order], target[order]
+            keep = np.ones(len(eq), bool)
+            keep[1:] = (eq[1:] != eq[:-1]) | (target[1:] != target[:-1])
+            eq, target = eq[keep], target[keep]
+
+    return result
+
+
+if __name__ == "__main__":
+    # Reads `input` by default; pass a path, or "-" for stdin.
+    path = sys.argv[1] if len(sys.argv) > 1 else "input"
+    with open(path) if path != "-" else sys.stdin as f:
+        part1 = part2 = 0
+        for part1, part2 in running_totals(iter_equations(f)):
+            pass
+    print(f"part 1: {part1}")
+    print(f"part 2: {part2}")
+
 
 @pytest.fixture
 def parsed_example() -> tuple[Equation, ...]:
@@ -130,6 +685,306 @@ def test_part_1_example(parsed_example):
     assert sum(e.test_value for e in parsed_example if e.possible_part1) == 3749
 
 
+def test_running_totals_example():
+    totals = list(running_totals(iter_equations(io.StringIO(example + "\n\n"))))
+    assert len(totals) == 9
+    assert totals[0] == (190, 190)
+    assert totals[-1] == (3749, 11387)
+
+
+def test_compile_plan_once():
+    assert compile_plan(("+", "*")) is PART1_PLAN
+    assert compile_plan(("+", "*", "||")) is PART2_PLAN
+    assert compile_plan(("*", "+")) is not PART1_PLAN
+
+
+def test_compile_plan_unknown_operator():
+    with pytest.raises(ValueError):
+        compile_plan(("+", "%"))
+
+
+@pytest.mark.parametrize(
+    "symbols, e, want",
+    (
+        (("+", "-"), Equation(test_value=3, operands=(5, 2)), True),
+        (("+", "-"), Equation(test_value=-1, operands=(1, 5, 3)), True),
+        (("+", "*"), Equation(test_value=-1, operands=(1, 5, 3)), False),
+        (("^",), Equation(test_value=6, operands=(5, 3)), True),
+        (("+", "^"), Equation(test_value=9, operands=(5, 3, 1)), True),
+        (("+", "^"), Equation(test_value=15, operands=(5, 3, 1)), False),
+    ),
+)
+def test_custom_operators(symbols: tuple[str, ...], e: Equation, want: bool):
+    assert e.possible_with(compile_plan(symbols)) is want
+
+
+def test_registered_operators_invert_apply():
+    for op in OPERATORS.values():
+        for left in range(-30, 30):
+            for right in range(0, 12):
+                result = op.apply(left, right)
+                back = op.inverse(result, right)
+                if back is ANYTHING:
+                    assert all(op.apply(x, right) == result for x in range(30))
+                elif back is not None:
+                    assert op.apply(back, right) == result, (op.symbol, left, right)
+
+
+@pytest.mark.parametrize("symbols", (("+", "*"), ("+", "*", "||"), ("+", "-", "^")))
+def test_meet_in_the_middle_matches_search(symbols: tuple[str, ...]):
+    rng = random.Random(7)
+    plan = compile_plan(symbols, mitm_threshold=None)
+    for _ in range(300):
+        operands = tuple(rng.randint(0, 12) for _ in range(rng.randint(1, 7)))
+        # Half the time build a target we know is reachable.
+        if rng.random() < 0.5:
+            test_value = operands[0]
+            for operand in operands[1:]:
+                test_value = rng.choice(plan.operators).apply(test_value, operand)
+        else:
+            test_value = rng.randint(0, 5000)
+        found = _meet_in_the_middle(plan, test_value, operands)
+        assert (found is not None) == plan.possible(test_value, operands), (
+            symbols,
+            test_value,
+            operands,
+        )
+
+
+@pytest.mark.parametrize(
+    "e, want",
+    (
+        (Equation(test_value=0, operands=(5, 0)), True),
+        (Equation(test_value=3, operands=(5, 0, 3)), True),
+        (Equation(test_value=1, operands=(5, 0, 1, 1)), True),
+        (Equation(test_value=9, operands=(5, 0, 1, 1)), False),
+        (Equation(test_value=4, operands=(5, 0)), False),
+    ),
+)
+def test_zero_operands(e: Equation, want: bool):
+    mitm = compile_plan(("+", "*"), mitm_threshold=2)
+    store = EquationStore.from_equations((e,))
+    assert e.possible_part1 is want
+    assert e.possible_with(mitm) is want
+    assert store.possible(0, PART1_PLAN) is want
+    assert store.possible(0, mitm) is want
+    for plan in (PART1_PLAN, mitm):
+        if want:
+            assert e.evaluate(e.explain(plan)) == e.test_value
+        else:
+            assert e.explain(plan) is None
+    assert set(e.solutions(PART1_PLAN)) == {
+        symbols
+        for symbols in product(("+", "*"), repeat=len(e.operands) - 1)
+        if e.evaluate(symbols) == e.test_value
+    }
+
+
+def test_concat_negative_left():
+    assert _concat(-3, 5) == -35
+    assert _unconcat(-35, 5) == -3
+    assert _unconcat(-5, 5) is None
+    e = Equation(test_value=-35, operands=(3, 6, 5))
+    assert e.evaluate(("-", "||")) == -35
+    assert e.possible_with(compile_plan(("-", "||")))
+
+
+@pytest.mark.parametrize("symbols", (("-", "||"), ("+", "-", "||"), ("*", "-", "||")))
+def test_reachable_targets_are_possible(symbols: tuple[str, ...]):
+    rng = random.Random(11)
+    plan = compile_plan(symbols, mitm_threshold=None)
+    mitm = compile_plan(symbols, mitm_threshold=2)
+    for _ in range(300):
+        e = Equation(0, tuple(rng.randint(0, 12) for _ in range(rng.randint(1, 5))))
+        chosen = tuple(rng.choice(symbols) for _ in e.operands[1:])
+        e = Equation(e.evaluate(chosen), e.operands)
+        for p in (plan, mitm):
+            assert e.evaluate(e.explain(p)) == e.test_value, (e, chosen)
+
+
+def test_meet_in_the_middle_long_line():
+    operands = tuple(range(1, 25))
+    test_value = 0
+    for i, operand in enumerate(operands):
+        test_value = test_value * operand if i % 3 == 2 else test_value + operand
+    assert len(operands) >= MITM_THRESHOLD
+    assert PART2_PLAN.possible(test_value, operands)
+    assert not PART1_PLAN.possible(-1, operands)
+
+
+def test_part_2_meet_in_the_middle(parsed_input):
+    plan = compile_plan(("+", "*", "||"), mitm_threshold=2)
+    assert sum(e.test_value for e in parsed_input if e.possible_with(plan)) == (
+        106016735664498
+    )
+
+
+def test_store_roundtrip(parsed_example):
+    store = EquationStore.from_lines(example.splitlines())
+    assert len(store) == len(parsed_example)
+    assert tuple(store[i] for i in range(len(store))) == parsed_example
+    assert EquationStore.from_equations(parsed_example) == store
+
+
+@pytest.mark.parametrize("plan", (PART1_PLAN, PART2_PLAN))
+def test_store_matches_search(parsed_example, plan: Plan):
+    store = EquationStore.from_equations(parsed_example)
+    assert [store.possible(i, plan) for i in range(len(store))] == [
+        e.possible_with(plan) for e in parsed_example
+    ]
+
+
+def test_store_meet_in_the_middle():
+    plan = compile_plan(("+", "*"), mitm_threshold=1)
+    store = EquationStore.from_equations(
+        (Equation(5, (5,)), Equation(190, (10, 19)), Equation(83, (17, 5)))
+    )
+    assert [store.possible(i, plan) for i in range(len(store))] == [
+        True,
+        True,
+        False,
+    ]
+    assert store.total(plan) == 195
+
+
+def test_store_rejects_values_past_int64():
+    with pytest.raises(OverflowError):
+        EquationStore.from_lines(["%d: 1 2" % 2**63])
+
+
+@pytest.mark.parametrize(
+    "e, want",
+    (
+        (Equation(test_value=190, operands=(10, 19)), {("*",)}),
+        (Equation(test_value=3267, operands=(81, 40, 27)), {("+", "*"), ("*", "+")}),
+        (Equation(test_value=83, operands=(17, 5)), set()),
+        (Equation(test_value=156, operands=(15, 6)), {("||",)}),
+        (Equation(test_value=7290, operands=(6, 8, 6, 15)), {("*", "||", "*")}),
+        (Equation(test_value=292, operands=(11, 6, 16, 20)), {("+", "*", "+")}),
+        (Equation(test_value=7, operands=(7,)), {()}),
+    ),
+)
+def test_explain_example(e: Equation, want: set[tuple[str, ...]]):
+    assert set(e.solutions()) == want
+    if want:
+        assert e.explain() in want
+    else:
+        assert e.explain() is None
+
+
+def test_explain_meet_in_the_middle():
+    plan = compile_plan(("+", "*", "||"), mitm_threshold=2)
+    e = Equation(test_value=3267, operands=(81, 40, 27))
+    assert e.explain(plan) in {("+", "*"), ("*", "+")}
+    assert Equation(test_value=83, operands=(17, 5)).explain(plan) is None
+
+
+def test_evaluate_wrong_length():
+    with pytest.raises(ValueError):
+        Equation(test_value=190, operands=(10, 19)).evaluate(("*", "+"))
+
+
+@pytest.fixture
+def small_memo():
+    set_memo_size(4)
+    yield
+    set_memo_size(MEMO_SIZE)
+
+
+def test_memo_bounded(parsed_example, small_memo):
+    assert sum(e.test_value for e in parsed_example if e.possible_part2) == 11387
+    info = memo_info()
+    assert info.maxsize == 4
+    assert info.currsize <= 4
+    assert info.misses > 0
+
+
+def test_memo_counters_and_clear(small_memo):
+    e = Equation(test_value=292, operands=(11, 6, 16, 20))
+    assert e.possible_part1
+    misses = memo_info().misses
+    assert e.possible_part1
+    assert memo_info().hits == 1
+    assert memo_info().misses == misses
+
+    clear_memo()
+    assert memo_info().currsize == 0
+    assert memo_info().hits == 0
+
+
+@pytest.mark.parametrize("concat_operator", (False, True))
+@pytest.mark.parametrize("chunk_size", (1, 4, 100))
+def test_parallel_matches_serial(parsed_example, concat_operator, chunk_size):
+    assert parallel_total(
+        parsed_example, concat_operator, chunk_size=chunk_size, max_workers=2
+    ) == _chunk_total(parsed_example, concat_operator)
+
+
+@pytest.mark.parametrize("concat_operator", (False, True))
+def test_batch_matches_serial(parsed_example, concat_operator: bool):
+    serial = [
+        e.possible_part2 if concat_operator else e.possible_part1
+        for e in parsed_example
+    ]
+    assert possible_batch(parsed_example, concat_operator).tolist() == serial
+
+
+@pytest.mark.parametrize(
+    "operand, want", ((0, 10), (1, 10), (9, 10), (10, 100), (99, 100), (100, 1000))
+)
+def test_concat_modulus(operand: int, want: int):
+    assert _concat_modulus(operand) == want
+
+
+@pytest.mark.parametrize(
+    "e, want",
+    (
+        (Equation(test_value=10, operands=(1, 0)), True),
+        (Equation(test_value=100, operands=(10, 0)), True),
+        (Equation(test_value=1010, operands=(10, 10)), True),
+        (Equation(test_value=5, operands=(5, 5)), False),
+        (Equation(test_value=105, operands=(1, 5)), False),
+    ),
+)
+def test_possible_part2_concat(e: Equation, want: bool):
+    assert e.possible_part2 is want
+
+
+def test_batch_edge_cases():
+    equations = (
+        Equation(test_value=5, operands=()),
+        Equation(test_value=5, operands=(5,)),
+        Equation(test_value=5, operands=(5, 0)),
+        Equation(test_value=10, operands=(1, 0)),
+        Equation(test_value=5, operands=(5, 5)),
+    )
+    assert possible_batch(equations).tolist() == [True, True, True, False, False]
+    assert possible_batch(equations, concat_operator=True).tolist() == [
+        True,
+        True,
+        True,
+        True,
+        False,
+    ]
+
+
+@pytest.mark.parametrize("concat_operator", (False, True))
+def test_batch_matches_serial_edge_cases(concat_operator: bool):
+    equations = (
+        Equation(test_value=0, operands=(5, 0)),
+        Equation(test_value=3, operands=(5, 0, 3)),
+        Equation(test_value=1, operands=(5, 0, 1, 1)),
+        Equation(test_value=9, operands=(5, 0, 1, 1)),
+        Equation(test_value=2 * 10**18, operands=(1, 10**18)),
+        Equation(test_value=10**18, operands=(0, 10**18)),
+        Equation(test_value=10**18 + 1, operands=(1, 10**18)),
+    )
+    serial = [
+        e.possible_part2 if concat_operator else e.possible_part1 for e in equations
+    ]
+    assert possible_batch(equations, concat_operator).tolist() == serial
+
+
 @pytest.fixture
 def read_input():
     with open("input") as f:
@@ -147,3 +1002,43 @@ def test_part_1(parsed_input):
 
 def test_part_2(parsed_input):
     assert sum(e.test_value for e in parsed_input if e.possible_part2) == 106016735664498
+
+
+def test_part_1_batch(parsed_input):
+    result = possible_batch(parsed_input)
+    assert sum(e.test_value for e, ok in zip(parsed_input, result) if ok) == (
+        12940396350192
+    )
+
+
+def test_part_2_batch(parsed_input):
+    result = possible_batch(parsed_input, concat_operator=True)
+    assert sum(e.test_value for e, ok in zip(parsed_input, result) if ok) == (
+        106016735664498
+    )
+
+
+def test_part_2_parallel(parsed_input):
+    assert parallel_total(parsed_input, concat_operator=True, chunk_size=64) == (
+        106016735664498
+    )
+
+
+def test_streaming_input():
+    with open("input") as f:
+        *_, last = running_totals(iter_equations(f))
+    assert last == (12940396350192, 106016735664498)
+
+
+def test_part_2_store():
+    with open("input") as f:
+        store = EquationStore.from_lines(f)
+    assert store.total(PART1_PLAN) == 12940396350192
+    assert store.total(PART2_PLAN) == 106016735664498
+
+
+@pytest.mark.parametrize("plan", (PART2_PLAN, compile_plan(("+", "*", "||"), 2)))
+def test_explain_input(parsed_input, plan: Plan):
+    for e in parsed_input:
+        if (symbols := e.explain(plan)) is not None:
+            assert e.evaluate(symbols) == e.test_value, (e, symbols)
@@ -1,3 +1,3 @@
-uvx pytest solution.py -vv
-# uvx pytest solution.py -vv -s --lf
+uvx --with numpy pytest solution.py -vv
+# uvx --with numpy pytest solution.py -vv -s --lf
 # uv run solution.py
@@ -1,18 +1,28 @@
 # /// script
 # dependencies = [
+#   "numpy",
 #   "pytest",
 # ]
 # ///
 from __future__ import annotations
-from dataclasses import dataclass
-from functools import cached_property, cache, total_ordering
-from collections import defaultdict
-from itertools import combinations
-
-
+from dataclasses import dataclass, field
+from functools import cache
+import sys
+from collections import Counter
+from collections.abc import Collection, Iterable, Iterator
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import combinations, repeat
+from pathlib import Path
+import io
+
+
+import numpy as np
 import pytest
 from pytest import param as prm
 
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from grid import MappedGrid  # noqa: E402
+
 
 example = """
 ............
@@ -36,6 +46,7 @@ class Cell:
 
     # Start with the assumption that nothing's an antipode.
     is_part_1_antinode: bool = False
+    is_part_2_antinode: bool = False
 
     def __str__(self) -> str:
         return (
@@ -56,64 +67,426 @@ class Cell:
         return isinstance(value, Cell) and self.frequency == value.frequency
 
 
-@total_ordering
+# A cell's position packed as row * width + col. Plain int comparison orders
+# points row-major, which is a total order, and costs nothing to hash.
+type Point = int
+
+
+# How many pairs to materialize at once when vectorizing a frequency.
+PAIR_BLOCK = 1 << 20
+
+
+def _pairs(n: int) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Indices (a, b) with a < b of every pair among `n` antennas.
+
+    Yields in blocks of about PAIR_BLOCK pairs so big frequencies don't need
+    every pair in memory at once.
+    """
+    block = max(1, PAIR_BLOCK // max(n, 1))
+    for start in range(0, n, block):
+        a, b = np.broadcast_arrays(
+            np.arange(start, min(start + block, n))[:, None], np.arange(n)[None, :]
+        )
+        later = b > a
+        yield a[later], b[later]
+
+
+def _pair_antinodes(
+    rows: np.ndarray, cols: np.ndarray, width: int, height: int
+) -> Iterator[tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Flat indices of the in-bounds antinodes of every pair of antennas.
+
+    A pair's antinodes sit one step past either antenna, at 2a - b and 2b - a,
+    so which antenna counts as "greater" doesn't matter. Each antinode comes
+    with the indices of the pair that produced it.
+    """
+    for a, b in _pairs(len(rows)):
+        r = np.concatenate((2 * rows[a] - rows[b], 2 * rows[b] - rows[a]))
+        c = np.concatenate((2 * cols[a] - cols[b], 2 * cols[b] - cols[a]))
+        inside = (r >= 0) & (r < height) & (c >= 0) & (c < width)
+        yield (
+            r[inside] * width + c[inside],
+            np.concatenate((a, a))[inside],
+            np.concatenate((b, b))[inside],
+        )
+
+
+def _harmonic_lines(
+    rows: np.ndarray, cols: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """One (row, col, row step, col step) per distinct line through a pair.
+
+    Steps are reduced by their gcd and pointed down (or right, for horizontal
+    lines), so every pair on the same line gets the same step. Together with
+    the cross product of the step and any point on it, which is constant
+    along the line, that identifies the line and lets pairs that share one
+    collapse to a single entry.
+    """
+
+    def distinct(lines: np.ndarray) -> np.ndarray:
+        # Sort on the line's key and keep the first row of each run of equal
+        # keys; np.unique(axis=0) would sort whole rows as opaque records.
+        lines = lines[np.lexsort((lines[:, 2], lines[:, 1], lines[:, 0]))]
+        keep = np.ones(len(lines), bool)
+        keep[1:] = (lines[1:, :3] != lines[:-1, :3]).any(axis=1)
+        return lines[keep]
+
+    # (row step, col step, cross, row, col), one row per distinct line merged
+    # so far, and blocks waiting to be merged in.
+    lines = np.empty((0, 5), np.int64)
+    pending, pending_rows = [], 0
+    for a, b in _pairs(len(rows)):
+        dr, dc = rows[b] - rows[a], cols[b] - cols[a]
+        g = np.gcd(dr, dc)
+        dr, dc = dr // g, dc // g
+        flip = (dr < 0) | ((dr == 0) & (dc < 0))
+        dr, dc = np.where(flip, -dr, dr), np.where(flip, -dc, dc)
+        cross = dr * cols[a] - dc * rows[a]
+        block = distinct(np.stack((dr, dc, cross, rows[a], cols[a]), axis=1))
+        pending.append(block)
+        pending_rows += len(block)
+        # Merging re-sorts everything found so far, so wait until the new rows
+        # are as many as that; the total sorting work stays O(n log n) and
+        # memory stays within twice the distinct lines plus a block.
+        if pending_rows >= max(PAIR_BLOCK, len(lines)):
+            lines = distinct(np.concatenate([lines, *pending]))
+            pending, pending_rows = [], 0
+    if pending:
+        lines = distinct(np.concatenate([lines, *pending]))
+    return lines[:, 3], lines[:, 4], lines[:, 0], lines[:, 1]
+
+
+def _t_range(
+    start: np.ndarray, step: np.ndarray, size: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """The range of t for which 0 <= start + t * step < size, inclusive.
+
+    Assumes `start` is in bounds; a zero step leaves t unbounded.
+    """
+    big = np.iinfo(np.int64).max // 4
+    safe = np.where(step == 0, 1, step)
+    # floor(x / y) is x // y; ceil(x / y) is -(-x // y).
+    low_edge, high_edge = -start, size - 1 - start
+    lo = np.where(safe > 0, -(-low_edge // safe), -(-high_edge // safe))
+    hi = np.where(safe > 0, high_edge // safe, low_edge // safe)
+    return np.where(step == 0, -big, lo), np.where(step == 0, big, hi)
+
+
+def _rasterize(
+    rows: np.ndarray,
+    cols: np.ndarray,
+    row_steps: np.ndarray,
+    col_steps: np.ndarray,
+    width: int,
+    height: int,
+) -> Iterator[np.ndarray]:
+    """Flat indices of every in-bounds grid point on each line."""
+    row_lo, row_hi = _t_range(rows, row_steps, height)
+    col_lo, col_hi = _t_range(cols, col_steps, width)
+    lo, hi = np.maximum(row_lo, col_lo), np.minimum(row_hi, col_hi)
+    counts = hi - lo + 1
+    ends = np.cumsum(counts)
+
+    # Walk the lines in chunks of about PAIR_BLOCK points.
+    first = 0
+    while first < len(counts):
+        done = ends[first - 1] if first else 0
+        last = int(np.searchsorted(ends, done + PAIR_BLOCK, side="right"))
+        last = max(first + 1, last)
+        chunk = counts[first:last]
+        line = np.repeat(np.arange(first, last), chunk)
+        # How far along its own line each point is, starting from that line's lo.
+        t = np.arange(len(line)) - np.repeat(np.cumsum(chunk) - chunk, chunk)
+        t += lo[line]
+        r = rows[line] + t * row_steps[line]
+        c = cols[line] + t * col_steps[line]
+        yield r * width + c
+        first = last
+
+
+def _coords(points: Collection[Point], width: int) -> tuple[np.ndarray, np.ndarray]:
+    """Unpack points into arrays of rows and columns."""
+    return np.divmod(np.fromiter(points, np.int64, len(points)), width)
+
+
+def _frequency_antinodes(
+    rows: np.ndarray, cols: np.ndarray, width: int, height: int, part: int
+) -> bytearray:
+    """One frequency's antinodes as a bitmap laid out like `Field.antinodes`."""
+    if part == 1:
+        blocks = (idx for idx, _, _ in _pair_antinodes(rows, cols, width, height))
+    else:
+        blocks = _rasterize(*_harmonic_lines(rows, cols), width, height)
+    # Scatter blocks as they arrive, so only one is held beside the bitmap.
+    bitmap = bytearray((width * height + 7) // 8)
+    for block in blocks:
+        _scatter_bits(bitmap, block)
+    return bitmap
+
+
 @dataclass(frozen=True)
-class Point:
-    row: int
-    col: int
+class AntinodeIndex:
+    """Which antenna pairs produce each part 1 antinode, in CSR form.
 
-    def __eq__(self, value: object, /) -> bool:
-        return (
-            isinstance(value, Point) and self.row == value.row and self.col == value.col
+    `cells` holds every antinode once, sorted. The pairs behind `cells[i]` are
+    `frequencies`, `firsts` and `seconds` from `offsets[i]` to `offsets[i + 1]`.
+    Memory is linear in the number of (antinode, pair) contributions.
+    """
+
+    cells: np.ndarray
+    offsets: np.ndarray
+    frequencies: np.ndarray
+    firsts: np.ndarray
+    seconds: np.ndarray
+
+    @classmethod
+    def build(
+        cls, freq_map: dict[int, set[Point]], width: int, height: int
+    ) -> AntinodeIndex:
+        cells, frequencies, firsts, seconds = [], [], [], []
+        for frequency, points in freq_map.items():
+            packed = np.fromiter(points, np.int64, len(points))
+            rows, cols = np.divmod(packed, width)
+            for idx, a, b in _pair_antinodes(rows, cols, width, height):
+                cells.append(idx)
+                frequencies.append(np.full(len(idx), frequency, np.uint8))
+                firsts.append(packed[a])
+                seconds.append(packed[b])
+        if not cells:
+            empty = np.empty(0, np.int64)
+            return cls(
+                empty, np.zeros(1, np.int64), empty.astype(np.uint8), empty, empty
+            )
+
+        all_cells = np.concatenate(cells)
+        order = np.argsort(all_cells, kind="stable")
+        distinct, counts = np.unique(all_cells[order], return_counts=True)
+        return cls(
+            cells=distinct,
+            offsets=np.concatenate(([0], np.cumsum(counts))),
+            frequencies=np.concatenate(frequencies)[order],
+            firsts=np.concatenate(firsts)[order],
+            seconds=np.concatenate(seconds)[order],
         )
 
-    def __gt__(self, value: object, /) -> bool:
-        if not isinstance(value, Point):
-            raise TypeError
-        return (self.row > value.row) or (self.col > value.col)
+    def sources(self, p: Point) -> list[tuple[int, Point, Point]]:
+        """(frequency, antenna, antenna) for each pair with an antinode at `p`."""
+        i = int(np.searchsorted(self.cells, p))
+        if i == len(self.cells) or self.cells[i] != p:
+            return []
+        lo, hi = self.offsets[i], self.offsets[i + 1]
+        return list(
+            zip(
+                self.frequencies[lo:hi].tolist(),
+                self.firsts[lo:hi].tolist(),
+                self.seconds[lo:hi].tolist(),
+            )
+        )
+
+
+def _scatter_bits(bitmap: bytearray, idx: np.ndarray) -> None:
+    """Set bit `i` of `bitmap` for every `i` in `idx`."""
+    view = np.frombuffer(bitmap, dtype=np.uint8)
+    np.bitwise_or.at(view, idx >> 3, np.left_shift(1, idx & 7).astype(np.uint8))
+
+
+# Turns a row of map characters into frequency bytes, with 0 for empty.
+_TO_FREQUENCY = bytes.maketrans(b".", b"\0")
+_FROM_FREQUENCY = bytes.maketrans(b"\0", b".")
+
+
+def _index_antennas(
+    freq_map: dict[int, set[Point]], cells: bytes, start: Point, empty: int
+) -> None:
+    """Add every non-`empty` byte in `cells`, the first at `start`, to freq_map."""
+    for i in np.flatnonzero(np.frombuffer(cells, np.uint8) != empty).tolist():
+        freq_map.setdefault(cells[i], set()).add(start + i)
 
 
 @dataclass
 class Field:
-    data: tuple[tuple[Cell, ...], ...]
-    _marked: bool = False
+    width: int
+    height: int
+    # One byte per cell, row-major: the frequency's character code, or 0. None
+    # if the field was loaded without per-cell storage; freq_map and the
+    # antinode bitmaps are all that counting antinodes needs.
+    frequencies: bytearray | None
+    # One bit per cell, row-major, set where there's a part 1 antinode.
+    antinodes: bytearray = field(init=False)
+    # Likewise for part 2's resonant harmonics. Stale after an edit until part 2
+    # is marked again.
+    harmonics: bytearray = field(init=False)
+    # The parts whose antinodes have been marked.
+    _marked: set[int] = field(default_factory=set)
+    # How many pairs put a part 1 antinode on each cell. Only built once the
+    # field is edited, and only holds cells with a nonzero count.
+    _pair_counts: Counter[int] | None = None
+    # Built from `frequencies` on first use unless the loader filled it in.
+    _freq_map: dict[int, set[Point]] | None = None
+    # Built by `mark_antinodes(index=True)`; dropped when the field is edited.
+    antinode_index: AntinodeIndex | None = field(default=None, init=False)
+
+    def __post_init__(self) -> None:
+        if self.frequencies is None and self._freq_map is None:
+            raise ValueError("Need frequencies, or a freq_map without them")
+        if (
+            self.frequencies is not None
+            and len(self.frequencies) != self.width * self.height
+        ):
+            raise ValueError(
+                "Expected %d cells; got %d"
+                % (self.width * self.height, len(self.frequencies))
+            )
+        self.antinodes = bytearray((self.width * self.height + 7) // 8)
+        self.harmonics = bytearray(len(self.antinodes))
 
     @classmethod
     def from_str(cls: type[Field], s: str) -> Field:
-        return Field(
-            data=tuple(
-                tuple(Cell.from_str(c) for c in line) for line in s.splitlines() if line
-            )
+        return cls.from_lines(s.splitlines())
+
+    @classmethod
+    def from_lines(
+        cls: type[Field], lines: Iterable[str | bytes], store_cells: bool = True
+    ) -> Field:
+        """Build a field one row at a time, indexing antennas as they're read.
+
+        With `store_cells=False` no per-cell storage is kept at all, which is
+        enough for `antinode_count` but not for rendering or editing.
+        """
+        frequencies = bytearray() if store_cells else None
+        freq_map: dict[int, set[Point]] = {}
+        width, height = None, 0
+        for line in lines:
+            if isinstance(line, str):
+                line = line.encode()
+            line = line.rstrip(b"\r\n")
+            if not line:
+                continue
+            if width is None:
+                width = len(line)
+            elif len(line) != width:
+                raise ValueError("Expected every row to be %d wide" % width)
+            _index_antennas(freq_map, line, height * width, ord("."))
+            if frequencies is not None:
+                frequencies += line.translate(_TO_FREQUENCY)
+            height += 1
+        return cls(
+            width=width or 0,
+            height=height,
+            frequencies=frequencies,
+            _freq_map=freq_map,
+        )
+
+    @classmethod
+    def from_grid(
+        cls: type[Field], grid: MappedGrid, store_cells: bool = True
+    ) -> Field:
+        """Index antennas straight out of a mapped grid; see `from_lines`."""
+        frequencies = bytearray() if store_cells else None
+        freq_map: dict[int, set[Point]] = {}
+        for row_idx, row in enumerate(grid):
+            _index_antennas(freq_map, row, row_idx * grid.cols, ord("."))
+            if frequencies is not None:
+                frequencies += bytes(row).translate(_TO_FREQUENCY)
+        return cls(
+            width=grid.cols,
+            height=grid.rows,
+            frequencies=frequencies,
+            _freq_map=freq_map,
+        )
+
+    @classmethod
+    def from_path(cls: type[Field], path: str, store_cells: bool = True) -> Field:
+        """Load a map through a memory-mapped grid; see `from_lines`."""
+        with MappedGrid(path) as grid:
+            return cls.from_grid(grid, store_cells)
+
+    def _cells(self) -> bytearray:
+        if self.frequencies is None:
+            raise ValueError("Field was loaded without per-cell storage")
+        return self.frequencies
+
+    def _is_antinode(self, idx: int, part: int = 1) -> bool:
+        bitmap = self.antinodes if part == 1 else self.harmonics
+        return bool(bitmap[idx >> 3] & (1 << (idx & 7)))
+
+    def _set_antinode(self, idx: int) -> None:
+        self.antinodes[idx >> 3] |= 1 << (idx & 7)
+
+    def _clear_antinode(self, idx: int) -> None:
+        self.antinodes[idx >> 3] &= ~(1 << (idx & 7)) & 0xFF
+
+    def _cell(self, idx: int) -> Cell:
+        frequency = self._cells()[idx]
+        return Cell(
+            frequency=frequency or None,
+            is_part_1_antinode=self._is_antinode(idx),
+            is_part_2_antinode=self._is_antinode(idx, part=2),
+        )
+
+    @property
+    def data(self) -> tuple[tuple[Cell, ...], ...]:
+        """Cell objects for every position; built fresh from the arrays."""
+        return tuple(
+            tuple(self._cell(row * self.width + col) for col in range(self.width))
+            for row in range(self.height)
         )
 
     def __str__(self) -> str:
-        out = []
-        i = 0
-        for row in self.data:
-            i += 1
-            for cell in row:
-                out.append(str(cell))
-            out.append("\n")
+        return self.render()
+
+    def render(
+        self,
+        part: int = 1,
+        top: int = 0,
+        left: int = 0,
+        height: int | None = None,
+        width: int | None = None,
+        step: int = 1,
+    ) -> str:
+        """Draw the field, or a `height` by `width` viewport of it.
+
+        Antinodes for `part` show as "#". With `step` > 1 only every step-th
+        row and column is drawn, for a quick look at a big field.
+        """
+        if step < 1:
+            raise ValueError("step must be positive; got %s" % step)
+        cells = self._cells()
+        bitmap = self.antinodes if part == 1 else self.harmonics
+        bottom = self.height if height is None else min(self.height, top + height)
+        right = self.width if width is None else min(self.width, left + width)
+        top, left = max(top, 0), max(left, 0)
+
+        out = bytearray()
+        for row in range(top, bottom, step):
+            start, stop = row * self.width + left, row * self.width + right
+            line = bytearray(cells[start:stop:step].translate(_FROM_FREQUENCY))
+            # Unpack just the bytes of the bitmap that cover this row.
+            first_byte = start >> 3
+            bits = np.unpackbits(
+                np.frombuffer(bitmap, np.uint8)[first_byte : (stop + 7) >> 3],
+                bitorder="little",
+            )[start - first_byte * 8 : stop - first_byte * 8 : step]
+            np.frombuffer(line, np.uint8)[bits.view(bool)] = ord("#")
+            out += line
+            out += b"\n"
         # Remove final newline.
-        return "".join(out[:-1])
-
-    @cached_property
-    def freq_map(self):
-        freq_map = defaultdict(set)
-        for row_idx, row in enumerate(self.data):
-            for col_idx, cell in enumerate(row):
-                if cell.frequency is not None:
-                    freq_map[cell.frequency].add(Point(row=row_idx, col=col_idx))
-        return {k: frozenset(v) for k, v in freq_map.items()}
-
-    def antinode_count(self):
-        self.mark_antinodes()
-        count = 0
-        for row in self.data:
-            for cell in row:
-                if cell.is_part_1_antinode:
-                    count += 1
-        return count
+        return out[:-1].decode()
+
+    @property
+    def freq_map(self) -> dict[int, set[Point]]:
+        if self._freq_map is None:
+            self._freq_map = {}
+            _index_antennas(self._freq_map, self._cells(), 0, 0)
+        return self._freq_map
+
+    def antinode_count(self, part: int = 1, executor: Executor | None = None):
+        if part == 1 and self._pair_counts is not None:
+            # Kept up to date by edits; counting the bitmap would be O(cells).
+            return len(self._pair_counts)
+        self.mark_antinodes(part, executor)
+        bitmap = self.antinodes if part == 1 else self.harmonics
+        return int.from_bytes(bitmap, "little").bit_count()
 
     def known_freqs(self):
         return frozenset(self.freq_map)
@@ -121,38 +494,130 @@ class Field:
     def coords_with_freq(self, freq=int):
         return self.freq_map[freq]
 
-    def mark_antinodes(self):
-        if self._marked:
+    def point(self, row: int, col: int) -> Point:
+        return row * self.width + col
+
+    def row_col(self, p: Point) -> tuple[int, int]:
+        return divmod(p, self.width)
+
+    def _pair_antinode_indices(self, p0: Point, p1: Point) -> Iterator[Point]:
+        (r0, c0), (r1, c1) = divmod(p0, self.width), divmod(p1, self.width)
+        for row, col in ((2 * r0 - r1, 2 * c0 - c1), (2 * r1 - r0, 2 * c1 - c0)):
+            if 0 <= row < self.height and 0 <= col < self.width:
+                yield row * self.width + col
+
+    def _counts(self) -> Counter[int]:
+        """Per-cell pair counts, built from scratch the first time."""
+        if self._pair_counts is None:
+            self._pair_counts = Counter()
+            for points in self.freq_map.values():
+                rows, cols = _coords(points, self.width)
+                for idx, _, _ in _pair_antinodes(rows, cols, self.width, self.height):
+                    cells, counts = np.unique(idx, return_counts=True)
+                    self._pair_counts.update(dict(zip(cells.tolist(), counts.tolist())))
+            self.antinodes[:] = bytes(len(self.antinodes))
+            for idx in self._pair_counts:
+                self._set_antinode(idx)
+            self._marked.add(1)
+        return self._pair_counts
+
+    def _edited(self) -> None:
+        # Part 1 is kept up to date incrementally; part 2 is remarked on demand.
+        self.antinode_index = None
+        self._marked.discard(2)
+
+    def add_antenna(self, row: int, col: int, frequency: int) -> None:
+        """Place an antenna, updating part 1 antinodes in O(antennas on freq)."""
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            raise ValueError("(%d, %d) is outside the field" % (row, col))
+        if not 0 < frequency < 256 or frequency == ord("."):
+            raise ValueError("Not a frequency: %s" % frequency)
+        idx = row * self.width + col
+        if self._cells()[idx]:
+            raise ValueError("(%d, %d) already has an antenna" % (row, col))
+
+        counts, new = self._counts(), idx
+        others = self.freq_map.setdefault(frequency, set())
+        for other in others:
+            for antinode in self._pair_antinode_indices(new, other):
+                counts[antinode] += 1
+                if counts[antinode] == 1:
+                    self._set_antinode(antinode)
+        others.add(new)
+        self.frequencies[idx] = frequency
+        self._edited()
+
+    def remove_antenna(self, row: int, col: int) -> None:
+        """Remove an antenna, updating part 1 antinodes in O(antennas on freq)."""
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            raise ValueError("(%d, %d) is outside the field" % (row, col))
+        idx = row * self.width + col
+        frequency = self._cells()[idx]
+        if not frequency:
+            raise ValueError("(%d, %d) has no antenna" % (row, col))
+
+        counts, old = self._counts(), idx
+        others = self.freq_map[frequency]
+        others.discard(old)
+        for other in others:
+            for antinode in self._pair_antinode_indices(old, other):
+                counts[antinode] -= 1
+                if not counts[antinode]:
+                    del counts[antinode]
+                    self._clear_antinode(antinode)
+        if not others:
+            del self.freq_map[frequency]
+        self.frequencies[idx] = 0
+        self._edited()
+
+    def mark_antinodes(
+        self, part: int = 1, executor: Executor | None = None, index: bool = False
+    ):
+        """Mark part 1 antinodes, or with `part=2`, resonant harmonics.
+
+        Frequencies are independent, so with an `executor` (e.g. a
+        `ProcessPoolExecutor`) each one is worked out in parallel and their
+        bitmaps are ORed into the field's as they come back.
+
+        With `index=True`, part 1 is marked serially while recording which
+        pairs produce each antinode in `antinode_index`.
+        """
+        if part not in (1, 2):
+            raise ValueError("Expected part 1 or 2; got %s" % part)
+        if index:
+            if part != 1:
+                raise ValueError("Only part 1 antinodes can be indexed")
+            if self.antinode_index is None:
+                self.antinode_index = AntinodeIndex.build(
+                    self.freq_map, self.width, self.height
+                )
+                _scatter_bits(self.antinodes, self.antinode_index.cells)
+                self._marked.add(1)
+            return
+        if part in self._marked:
             return
-        for k, v in self.freq_map.items():
-            for p0, p1 in combinations(v, 2):
-                greater, lesser = (p0, p1) if p0 > p1 else (p1, p0)
-                row_diff = greater.row - lesser.row
-                col_diff = greater.col - lesser.col
-
-                antinode_lesser = Point(lesser.row - row_diff, lesser.col - col_diff)
-                antinode_greater = Point(greater.row + row_diff, greater.col + col_diff)
-
-                for antinode in (antinode_lesser, antinode_greater):
-                    if antinode.row < 0 or antinode.col < 0:
-                        continue
-                    row = tuple()
-                    try:
-                        row = self.data[antinode.row]
-                    except IndexError:
-                        pass
-                    try:
-                        row[antinode.col].is_part_1_antinode = True
-                    except IndexError:
-                        pass
-        self._marked = True
+        coords = [_coords(points, self.width) for points in self.freq_map.values()]
+        results = (map if executor is None else executor.map)(
+            _frequency_antinodes,
+            [rows for rows, _ in coords],
+            [cols for _, cols in coords],
+            repeat(self.width, len(coords)),
+            repeat(self.height, len(coords)),
+            repeat(part, len(coords)),
+        )
+        view = np.frombuffer(self.antinodes if part == 1 else self.harmonics, np.uint8)
+        if part == 2:
+            # Clear out whatever was marked before the last edit, in place.
+            view.fill(0)
+        for found in results:
+            np.bitwise_or(view, np.frombuffer(found, np.uint8), out=view)
+        self._marked.add(part)
 
 
 if __name__ == "__main__":
-    with open("input") as f:
-        i = f.read()
-    field = Field.from_str(i)
+    field = Field.from_path("input", store_cells=False)
     print(f"part 1: {field.antinode_count()}")
+    print(f"part 2: {field.antinode_count(part=2)}")
 
 
 @pytest.mark.parametrize(
@@ -199,8 +664,289 @@ def test_example():
 
     assert f.antinode_count() == 14
 
+
+def test_from_str_ragged():
+    with pytest.raises(ValueError):
+        Field.from_str("...\n..\n")
+
+
+def test_storage_is_compact():
+    f = Field.from_str(example)
+    assert (f.width, f.height) == (12, 12)
+    assert len(f.frequencies) == 144
+    assert len(f.antinodes) == 18
+    assert f.frequencies[1 * 12 + 8] == ord("0")
+    assert f.frequencies[0] == 0
+
+
+def test_vectorized_matches_pairwise():
+    rng = np.random.default_rng(8)
+    grid = rng.choice(list(b"....abc"), size=(40, 30)).astype(np.uint8)
+    f = Field.from_str("\n".join(bytes(row).decode() for row in grid))
+    f.mark_antinodes()
+
+    want = set()
+    for points in f.freq_map.values():
+        for p0, p1 in combinations(points, 2):
+            (r0, c0), (r1, c1) = f.row_col(p0), f.row_col(p1)
+            for r, c in ((2 * r0 - r1, 2 * c0 - c1), (2 * r1 - r0, 2 * c1 - c0)):
+                if 0 <= r < f.height and 0 <= c < f.width:
+                    want.add(r * f.width + c)
+    got = {i for i in range(f.width * f.height) if f._is_antinode(i)}
+    assert got == want
+
+
+def test_pair_antinodes_blocks(monkeypatch):
+    monkeypatch.setitem(globals(), "PAIR_BLOCK", 2)
+    f = Field.from_str(example)
+    assert f.antinode_count() == 14
+
+
+def _brute_force_harmonics(f: Field) -> set[int]:
+    want = set()
+    for points in f.freq_map.values():
+        for p0, p1 in combinations(points, 2):
+            (r0, c0), (r1, c1) = f.row_col(p0), f.row_col(p1)
+            for row in range(f.height):
+                for col in range(f.width):
+                    # Collinear with the pair; the gcd reduction makes every
+                    # such grid point an integer step along the line.
+                    if (r1 - r0) * (col - c0) == (c1 - c0) * (row - r0):
+                        want.add(row * f.width + col)
+    return want
+
+
+def test_harmonics_example():
+    f = Field.from_str(example)
+    assert f.antinode_count(part=2) == 34
+    assert f.antinode_count() == 14
+
+
+def test_harmonics_match_brute_force(monkeypatch):
+    # Small blocks exercise the chunking in _pairs and _rasterize.
+    monkeypatch.setitem(globals(), "PAIR_BLOCK", 7)
+    rng = np.random.default_rng(13)
+    grid = rng.choice(list(b"........ab"), size=(23, 17)).astype(np.uint8)
+    f = Field.from_str("\n".join(bytes(row).decode() for row in grid))
+    f.mark_antinodes(part=2)
+    got = {i for i in range(f.width * f.height) if f._is_antinode(i, part=2)}
+    assert got == _brute_force_harmonics(f)
+
+
+def test_harmonic_lines_dedupe():
+    # Four antennas on one diagonal make six pairs but one line.
+    rows = np.array([0, 1, 2, 4])
+    cols = np.array([0, 1, 2, 4])
+    anchor_rows, anchor_cols, row_steps, col_steps = _harmonic_lines(rows, cols)
+    assert len(anchor_rows) == 1
+    assert (row_steps[0], col_steps[0]) == (1, 1)
+
+
+def test_harmonic_lines_dedupe_across_blocks(monkeypatch):
+    monkeypatch.setitem(globals(), "PAIR_BLOCK", 1)
+    rows = np.array([0, 1, 2, 4, 0])
+    cols = np.array([0, 1, 2, 4, 3])
+    _, _, row_steps, col_steps = _harmonic_lines(rows, cols)
+    # The diagonal, plus one line from (0, 3) to each of the other four.
+    assert len(row_steps) == 5
+
+
+def test_add_remove_antenna_example():
+    f = Field.from_str(example)
+    assert f.antinode_count() == 14
+    f.add_antenna(0, 0, ord("A"))
+    f.remove_antenna(0, 0)
+    assert f.antinode_count() == 14
+    want = Field.from_str(example)
+    want.mark_antinodes()
+    assert (f.frequencies, f.antinodes) == (want.frequencies, want.antinodes)
+
+    with pytest.raises(ValueError):
+        f.remove_antenna(0, 0)
+    with pytest.raises(ValueError):
+        f.add_antenna(1, 8, ord("a"))
+    with pytest.raises(ValueError):
+        f.add_antenna(12, 0, ord("a"))
+
+
+def test_incremental_matches_rebuild():
+    rng = np.random.default_rng(14)
+    grid = rng.choice(list(b"......ab"), size=(19, 21)).astype(np.uint8)
+    f = Field.from_str("\n".join(bytes(row).decode() for row in grid))
+    for _ in range(200):
+        row, col = int(rng.integers(f.height)), int(rng.integers(f.width))
+        if f.frequencies[row * f.width + col]:
+            f.remove_antenna(row, col)
+        else:
+            f.add_antenna(row, col, int(rng.choice(list(b"abc"))))
+
+        rebuilt = Field(
+            width=f.width, height=f.height, frequencies=bytearray(f.frequencies)
+        )
+        assert f.antinode_count() == rebuilt.antinode_count()
+        assert f.antinodes == rebuilt.antinodes
+        if row % 5 == 0:
+            assert f.antinode_count(part=2) == rebuilt.antinode_count(part=2)
+            assert f.harmonics == rebuilt.harmonics
+    assert f.antinode_count(part=2) == rebuilt.antinode_count(part=2)
+
+
+@pytest.mark.parametrize("part", (1, 2))
+def test_parallel_matches_serial(part: int):
+    serial, parallel = Field.from_str(example), Field.from_str(example)
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        assert parallel.antinode_count(part, executor=pool) == serial.antinode_count(
+            part
+        )
+    assert parallel.antinodes == serial.antinodes
+    assert parallel.harmonics == serial.harmonics
+
+
+def test_freq_map_packed_points():
+    f = Field.from_str(example)
+    assert f.coords_with_freq(ord("A")) == {
+        f.point(5, 6),
+        f.point(8, 8),
+        f.point(9, 9),
+    }
+    assert sorted(f.coords_with_freq(ord("0"))) == [
+        f.point(1, 8),
+        f.point(2, 5),
+        f.point(3, 7),
+        f.point(4, 4),
+    ]
+    assert f.row_col(f.point(3, 7)) == (3, 7)
+
+
+def test_from_lines_matches_from_str():
+    want = Field.from_str(example)
+    for lines in (
+        io.StringIO(example),
+        io.BytesIO(example.replace("\n", "\r\n").encode()),
+    ):
+        got = Field.from_lines(lines)
+        assert (got.width, got.height) == (want.width, want.height)
+        assert got.frequencies == want.frequencies
+        assert got.freq_map == want.freq_map
+
+
+def test_without_cells(tmp_path):
+    path = tmp_path / "map"
+    path.write_text(example)
+    f = Field.from_path(str(path), store_cells=False)
+    assert f.frequencies is None
+    assert (f.width, f.height) == (12, 12)
+    assert f.antinode_count() == 14
+    assert f.antinode_count(part=2) == 34
+    with pytest.raises(ValueError):
+        str(f)
+
+
+def test_from_path_crlf(tmp_path):
+    path = tmp_path / "map"
+    path.write_bytes(example.strip().replace("\n", "\r\n").encode() + b"\r\n")
+    got, want = Field.from_path(str(path)), Field.from_str(example)
+    assert (got.width, got.height) == (want.width, want.height)
+    assert got.frequencies == want.frequencies
+    assert got.freq_map == want.freq_map
+
+
+def test_from_path_ragged(tmp_path):
+    path = tmp_path / "map"
+    # The row widths add up to four rows of three.
+    path.write_text("abc\nd\nefghi\nxyz\n")
+    with pytest.raises(ValueError):
+        Field.from_path(str(path))
+    with pytest.raises(ValueError):
+        Field.from_str(path.read_text())
+
+
+def test_from_path_empty(tmp_path):
+    path = tmp_path / "map"
+    path.write_text("")
+    assert Field.from_path(str(path)).antinode_count() == 0
+
+
+def test_render_viewport():
+    f = Field.from_str(example)
+    f.mark_antinodes()
+    assert str(f) == f.render()
+    assert f.render(top=1, left=2, height=3, width=4) == ".#..\n..#0\n#..."
+    assert f.render(step=4) == "...\n.0.\n..A"
+    assert f.render(step=3) == "..#.\n....\n.#..\n...A"
+    assert f.render(top=20) == ""
+
+
+def test_render_harmonics():
+    f = Field.from_str(example)
+    f.mark_antinodes(part=2)
+    rendered = f.render(part=2)
+    assert rendered.splitlines()[0] == "##....#....#"
+    assert rendered.count("#") == 34
+
+
+def test_antinode_index_example():
+    f, want = Field.from_str(example), Field.from_str(example)
+    f.mark_antinodes(index=True)
+    want.mark_antinodes()
+    assert f.antinodes == want.antinodes
+    index = f.antinode_index
+    assert index is not None
+    assert len(index.cells) == 14
+
+    for cell in index.cells.tolist():
+        sources = index.sources(cell)
+        assert sources
+        for frequency, a, b in sources:
+            (ra, ca), (rb, cb) = f.row_col(a), f.row_col(b)
+            assert f.frequencies[a] == f.frequencies[b] == frequency
+            assert cell in (
+                f.point(2 * ra - rb, 2 * ca - cb),
+                f.point(2 * rb - ra, 2 * cb - ca),
+            )
+    assert index.sources(f.point(0, 0)) == []
+    # Two frequencies put an antinode on (1, 3).
+    assert {
+        (chr(frequency), frozenset((f.row_col(a), f.row_col(b))))
+        for frequency, a, b in index.sources(f.point(1, 3))
+    } == {
+        ("0", frozenset(((3, 7), (2, 5)))),
+        ("A", frozenset(((5, 6), (9, 9)))),
+    }
+
+
+def test_antinode_index_dropped_on_edit():
+    f = Field.from_str(example)
+    f.mark_antinodes(index=True)
+    f.add_antenna(0, 0, ord("A"))
+    assert f.antinode_index is None
+    with pytest.raises(ValueError):
+        f.mark_antinodes(part=2, index=True)
+
+
 def test_part_1():
     with open("input") as f:
         i = f.read()
     field = Field.from_str(i)
     assert field.antinode_count() == 276
+
+
+def test_part_2():
+    with open("input") as f:
+        i = f.read()
+    field = Field.from_str(i)
+    assert field.antinode_count(part=2) == 991
+
+
+def test_part_2_parallel():
+    with open("input") as f:
+        i = f.read()
+    field = Field.from_str(i)
+    with ProcessPoolExecutor() as pool:
+        assert field.antinode_count(part=2, executor=pool) == 991
+
+
+def test_part_2_from_path():
+    field = Field.from_path("input", store_cells=False)
+    assert field.antinode_count() == 276
+    assert field.antinode_count(part=2) == 991
@@ -1,2 +1,2 @@
-uvx pytest solution.py -vv
+uvx --with numpy pytest solution.py -vv
 uv run solution.py
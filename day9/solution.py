@@ -1,12 +1,21 @@
 # /// script
 # dependencies = [
+#   "numpy",
 #   "pytest",
 # ]
 # ///
 from __future__ import annotations
-from dataclasses import dataclass
+import heapq
+import io
+import random
+from array import array
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import TextIO
 from enum import Enum, auto
 
+import numpy as np
+
 
 example = "2333133121414131402"
 
@@ -16,6 +25,15 @@ class _Sentinel: ...
 
 SENTINEL = _Sentinel()
 
+# A disk map gives each run as one digit.
+MAX_RUN = 9
+
+# Free blocks in an expanded layout.
+FREE = -1
+
+# Characters read from a disk map file at a time.
+CHUNK_SIZE = 1 << 16
+
 
 class BlockType(Enum):
     FILE = auto()
@@ -26,67 +44,349 @@ class BlockType(Enum):
 class Block:
     length: int
     type_: BlockType
+    # Which file the blocks belong to; None for free space.
+    file_id: int | None = None
+
+
+def run_checksum(file_id: int, start: int, length: int) -> int:
+    """What `length` blocks of a file starting at `start` add to a checksum."""
+    # The positions start..start + length - 1 sum to length * start plus the
+    # triangle number of length - 1.
+    return file_id * (length * start + length * (length - 1) // 2)
+
+
+def checksum(blocks: Iterable[Block]) -> int:
+    """Checksum a layout one run at a time, in whatever order it's laid out.
+
+    Takes any iterable, so runs can be checksummed as they're produced.
+    """
+    result = 0
+    position = 0
+    for block in blocks:
+        if block.type_ is BlockType.FILE:
+            result += run_checksum(block.file_id, position, block.length)
+        position += block.length
+    return result
+
+
+def compact_array(layout: np.ndarray) -> np.ndarray:
+    """`FS.compact` on an expanded layout: the last file blocks fill the first gaps."""
+    compacted = layout.copy()
+    used = np.count_nonzero(layout != FREE)
+    holes = np.flatnonzero(layout[:used] == FREE)
+    # Every hole before `used` is matched by a file block after it.
+    movers = np.flatnonzero(layout[used:] != FREE)[::-1] + used
+    compacted[holes] = layout[movers]
+    compacted[used:] = FREE
+    return compacted
+
+
+INT64_MAX = 2**63 - 1
+
+
+def array_checksum(layout: np.ndarray) -> int:
+    """`FS.checksum` as dot products with the positions, summed as Python ints.
+
+    Big layouts overflow an int64 long before the checksum is done, so each
+    dot product covers only as many blocks as it can without overflowing.
+    """
+    ids = np.where(layout == FREE, 0, layout).astype(np.int64)
+    largest = len(layout) * int(ids.max(initial=0))
+    if largest > INT64_MAX:
+        raise OverflowError("position * file id doesn't fit in an int64")
+    chunk = max(1, INT64_MAX // max(largest, 1))
+    total = 0
+    for start in range(0, len(layout), chunk):
+        stop = min(start + chunk, len(layout))
+        positions = np.arange(start, stop, dtype=np.int64)
+        total += int(np.dot(positions, ids[start:stop]))
+    return total
+
+
+def iter_records(
+    f: TextIO, chunk_size: int = CHUNK_SIZE
+) -> Iterator[tuple[int, int, int]]:
+    """Lazily parse a disk map into (file_id, length, gap) records.
+
+    Only one chunk of `f` is held at a time. A file's length and gap may fall in
+    different chunks, and whitespace anywhere is skipped. The last file's gap
+    is 0.
+    """
+    file_id = 0
+    length = None
+    while chunk := f.read(chunk_size):
+        for c in chunk:
+            if c.isspace():
+                continue
+            if length is None:
+                length = int(c)
+            else:
+                yield file_id, length, int(c)
+                file_id += 1
+                length = None
+    if length is not None:
+        yield file_id, length, 0
+
+
+@dataclass
+class DiskMap:
+    """A disk map packed into byte arrays.
+
+    File `i` is `lengths[i]` blocks followed by `gaps[i]` free ones.
+    """
+
+    lengths: array = field(default_factory=lambda: array("B"))
+    gaps: array = field(default_factory=lambda: array("B"))
+
+    @classmethod
+    def from_file(cls, f: TextIO, chunk_size: int = CHUNK_SIZE) -> DiskMap:
+        disk = cls()
+        for _, length, gap in iter_records(f, chunk_size):
+            disk.append(length, gap)
+        return disk
+
+    def append(self, length: int, gap: int) -> None:
+        self.lengths.append(length)
+        self.gaps.append(gap)
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def blocks(self) -> Iterator[Block]:
+        """The runs of the layout, left to right, leaving out empty gaps."""
+        for file_id, (length, gap) in enumerate(zip(self.lengths, self.gaps)):
+            yield Block(length, BlockType.FILE, file_id)
+            if gap:
+                yield Block(gap, BlockType.EMPTY)
+
+
+class _FreeSpans:
+    """Free space on a disk, as maximal spans, for `FS.defragment`.
+
+    Spans are kept in one min-heap of (start, length) per span length, so the
+    leftmost span a file fits in is at the top of one of the few heaps at
+    least as long as the file. Spans longer than MAX_RUN share the last heap,
+    which only has to be searched through for files that long too. Heap
+    entries for spans since taken or merged are dropped when they surface.
+    """
+
+    def __init__(self) -> None:
+        self.heaps: list[list[tuple[int, int]]] = [[] for _ in range(MAX_RUN + 1)]
+        # Every current span's length by its start, and its start by its end.
+        self.lengths: dict[int, int] = {}
+        self.starts: dict[int, int] = {}
+
+    def _add(self, start: int, length: int) -> None:
+        self.lengths[start] = length
+        self.starts[start + length] = start
+        heapq.heappush(self.heaps[min(length, MAX_RUN)], (start, length))
+
+    def _remove(self, start: int) -> int:
+        length = self.lengths.pop(start)
+        del self.starts[start + length]
+        return length
+
+    def _live(self, span: tuple[int, int]) -> bool:
+        return self.lengths.get(span[0]) == span[1]
+
+    def free(self, start: int, length: int) -> None:
+        """Mark blocks free, merging them with any free neighbours."""
+        end = start + length
+        if start in self.starts:
+            start = self.starts[start]
+            self._remove(start)
+        if end in self.lengths:
+            end += self._remove(end)
+        self._add(start, end - start)
+
+    def find(self, length: int, before: int) -> int | None:
+        """The start of the leftmost span of `length` that starts before `before`."""
+        best = None
+        for span_length in range(min(length, MAX_RUN), MAX_RUN + 1):
+            heap = self.heaps[span_length]
+            while heap and not self._live(heap[0]):
+                heapq.heappop(heap)
+            if length > MAX_RUN:
+                candidates = (
+                    start
+                    for start, long_length in heap
+                    if long_length >= length and self._live((start, long_length))
+                )
+                start = min(candidates, default=None)
+            else:
+                start = heap[0][0] if heap else None
+            if start is not None and start < before and (best is None or start < best):
+                best = start
+        return best
+
+    def take(self, start: int, length: int) -> None:
+        """Fill the first `length` blocks of the span at `start`."""
+        rest = self._remove(start) - length
+        if rest:
+            self._add(start + length, rest)
 
 
 @dataclass
 class FS:
+    # Runs of blocks, left to right.
     files: list[Block]
 
     @classmethod
     def from_str(cls, s: str) -> "FS":
         files = []
-        for i, c in enumerate(s):
-            if c == "\n":
-                continue
+        for i, c in enumerate(s.strip()):
             files.append(
-                Block(
-                    length=int(c),
-                    type_=BlockType.EMPTY if i % 2 == 0 else BlockType.FILE,
-                )
+                Block(length=int(c), type_=BlockType.EMPTY)
+                if i % 2
+                else Block(length=int(c), type_=BlockType.FILE, file_id=i // 2)
             )
         return cls(files=list(files))
 
+    @classmethod
+    def from_file(cls, f: TextIO, chunk_size: int = CHUNK_SIZE) -> FS:
+        return cls(files=list(DiskMap.from_file(f, chunk_size).blocks()))
+
     def compact(self) -> None:
+        """Fill free space from the left with file blocks taken from the right.
+
+        Works on whole runs with one pointer walking forward over free space
+        and one walking back over files, so the cost is in runs, not blocks.
+        """
+        runs = [block for block in self.files if block.length]
+        # File blocks in each run not yet moved elsewhere.
+        remaining = [block.length for block in runs]
+        compacted: list[Block] = []
+
+        def append(file_id: int | None, length: int) -> None:
+            if compacted and compacted[-1].file_id == file_id:
+                compacted[-1].length += length
+            else:
+                compacted.append(Block(length, BlockType.FILE, file_id))
+
+        right = len(runs) - 1
+        for left, block in enumerate(runs):
+            if left > right:
+                break
+            if block.type_ is BlockType.FILE:
+                if remaining[left]:
+                    append(block.file_id, remaining[left])
+                continue
 
+            gap = block.length
+            while gap:
+                while right > left and (
+                    runs[right].type_ is BlockType.EMPTY or not remaining[right]
+                ):
+                    right -= 1
+                if right <= left:
+                    break
+                moved = min(gap, remaining[right])
+                remaining[right] -= moved
+                gap -= moved
+                append(runs[right].file_id, moved)
+
+        free = sum(block.length for block in runs) - sum(
+            block.length for block in compacted
+        )
+        if free:
+            compacted.append(Block(free, BlockType.EMPTY))
+        self.files = compacted
+
+    def defragment(self) -> None:
+        """Move each whole file, highest id first, to the leftmost gap it fits.
+
+        A file split over several runs moves as one, and the space it leaves
+        behind can take files that come later. See `_FreeSpans` for how gaps
+        are found.
+        """
+        # Each file's runs as (start, length), in disk order.
+        runs: dict[int, list[tuple[int, int]]] = {}
+        spans = _FreeSpans()
+        position = 0
+        for block in self.files:
+            if not block.length:
+                continue
+            if block.type_ is BlockType.FILE:
+                runs.setdefault(block.file_id, []).append((position, block.length))
+            else:
+                spans.free(position, block.length)
+            position += block.length
+        size = position
+
+        for file_id in sorted(runs, reverse=True):
+            length = sum(run_length for _, run_length in runs[file_id])
+            gap = spans.find(length, before=runs[file_id][0][0])
+            if gap is None:
+                continue
+            spans.take(gap, length)
+            for run_start, run_length in runs[file_id]:
+                spans.free(run_start, run_length)
+            runs[file_id] = [(gap, length)]
+
+        placed = sorted(
+            (start, length, file_id)
+            for file_id, file_runs in runs.items()
+            for start, length in file_runs
+        )
+        defragmented: list[Block] = []
+        position = 0
+        for start, length, file_id in placed:
+            if start > position:
+                defragmented.append(Block(start - position, BlockType.EMPTY))
+            defragmented.append(Block(length, BlockType.FILE, file_id))
+            position = start + length
+        if size > position:
+            defragmented.append(Block(size - position, BlockType.EMPTY))
+        self.files = defragmented
 
     def checksum(self) -> int:
-        result = 0
-        for i, x in enumerate(self.files):
-            if x is not None:
-                result += x * i
-        return result
+        return checksum(self.files)
+
+    def to_array(self) -> np.ndarray:
+        """One entry per block: its file id, or FREE."""
+        ids = np.array(
+            [FREE if block.file_id is None else block.file_id for block in self.files],
+            dtype=np.int32,
+        )
+        lengths = np.array([block.length for block in self.files], dtype=np.int64)
+        return np.repeat(ids, lengths)
 
     def __str__(self) -> str:
-        return "".join([str(x) if x is not None else "." for x in self.files])
+        return "".join("." if x == FREE else str(x) for x in self.to_array().tolist())
 
 
 if __name__ == "__main__":
     with open("input") as f:
-        i = f.read()
-    fs = FS.from_str(i)
+        disk = DiskMap.from_file(f)
+    fs = FS(files=list(disk.blocks()))
     print("compacting...")
     fs.compact()
     print(fs.checksum())
+    fs = FS(files=list(disk.blocks()))
+    print("defragmenting...")
+    fs.defragment()
+    print(fs.checksum())
 
 
 def test_trivial():
     fs = FS.from_str("12345")
-    assert fs.files == [0] + [None] * 2 + [1] * 3 + [None] * 4 + [2] * 5
+    assert fs.to_array().tolist() == [0] + [FREE] * 2 + [1] * 3 + [FREE] * 4 + [2] * 5
 
 
 def test_example():
     fs = FS.from_str("2333133121414131402")
 
+    _ = FREE
     # fmt: off
-    assert fs.files == [
-        0, 0, None, None, None,
-        1, 1, 1, None, None, None,
-        2, None, None, None,
-        3, 3, 3, None,
-        4, 4, None,
-        5, 5, 5, 5, None,
-        6, 6, 6, 6, None,
-        7, 7, 7, None,
+    assert fs.to_array().tolist() == [
+        0, 0, _, _, _,
+        1, 1, 1, _, _, _,
+        2, _, _, _,
+        3, 3, 3, _,
+        4, 4, _,
+        5, 5, 5, 5, _,
+        6, 6, 6, 6, _,
+        7, 7, 7, _,
         8, 8, 8, 8,
         9, 9,
     ]
@@ -98,11 +398,134 @@ def test_example():
     assert fs.checksum() == 1928
 
 
-# Skipping: slow.
-# def test_part1():
-#     with open("input") as f:
-#         i = f.read()
-#     fs = FS.from_str(i)
-#     print("compacting...")
-#     fs.compact()
-#     assert fs.checksum() == 6360094256423
+def test_compact_runs():
+    fs = FS.from_str("12345")
+    fs.compact()
+    assert str(fs) == "022111222......"
+    assert [(b.file_id, b.length) for b in fs.files] == [
+        (0, 1),
+        (2, 2),
+        (1, 3),
+        (2, 3),
+        (None, 6),
+    ]
+
+
+def test_part1():
+    with open("input") as f:
+        i = f.read()
+    fs = FS.from_str(i)
+    fs.compact()
+    assert fs.checksum() == 6360094256423
+
+
+def test_example_defragment():
+    fs = FS.from_str(example)
+    fs.defragment()
+    assert str(fs) == "00992111777.44.333....5555.6666.....8888.."
+    assert fs.checksum() == 2858
+
+
+def test_part2():
+    with open("input") as f:
+        i = f.read()
+    fs = FS.from_str(i)
+    fs.defragment()
+    assert fs.checksum() == 6379677752410
+
+
+def test_checksum_uncompacted():
+    fs = FS.from_str(example)
+    expected = sum(i * x for i, x in enumerate(fs.to_array().tolist()) if x != FREE)
+    assert fs.checksum() == expected
+    assert checksum(iter(fs.files)) == expected
+    assert run_checksum(7, 3, 4) == 7 * (3 + 4 + 5 + 6)
+
+
+def test_compact_array():
+    fs = FS.from_str(example)
+    layout = compact_array(fs.to_array())
+    fs.compact()
+    assert layout.dtype == np.int32
+    assert np.array_equal(layout, fs.to_array())
+    assert array_checksum(layout) == fs.checksum() == 1928
+
+
+def test_array_checksum_past_int64():
+    file_id = np.iinfo(np.int32).max
+    fs = FS(
+        files=[
+            Block(10**6, BlockType.EMPTY),
+            Block(10**6, BlockType.FILE, file_id),
+            Block(3, BlockType.FILE, 1),
+        ]
+    )
+    assert fs.checksum() > 2**63
+    assert array_checksum(fs.to_array()) == fs.checksum()
+
+
+def test_iter_records_chunks():
+    text = "23331\n33121414131402\n"
+    for chunk_size in (1, 2, 3, 5, 64):
+        records = list(iter_records(io.StringIO(text), chunk_size))
+        assert records[:2] == [(0, 2, 3), (1, 3, 3)]
+        assert records[-1] == (9, 2, 0)
+        assert len(records) == 10
+
+
+def test_from_file():
+    fs = FS.from_file(io.StringIO(example + "\n"), chunk_size=4)
+    assert np.array_equal(fs.to_array(), FS.from_str(example).to_array())
+    with open("input") as f:
+        i = f.read()
+        f.seek(0)
+        disk = DiskMap.from_file(f)
+    assert len(disk) == len(i.strip()) // 2 + 1
+    assert checksum(disk.blocks()) == FS.from_str(i).checksum()
+
+
+def _defragment_blocks(layout: list[int]) -> list[int]:
+    """`FS.defragment` one block at a time, for checking it."""
+    layout = list(layout)
+    for file_id in sorted({x for x in layout if x != FREE}, reverse=True):
+        where = [i for i, x in enumerate(layout) if x == file_id]
+        span = 0
+        for i in range(where[0]):
+            span = span + 1 if layout[i] == FREE else 0
+            if span == len(where):
+                for j in where:
+                    layout[j] = FREE
+                layout[i - span + 1 : i + 1] = [file_id] * span
+                break
+    return layout
+
+
+def test_defragment_own_layouts():
+    fs = FS.from_str(example)
+    fs.compact()
+    compacted = fs.to_array()
+    fs.defragment()
+    assert np.array_equal(fs.to_array(), compacted)
+
+    # The first pass leaves gaps longer than MAX_RUN for the second.
+    fs = FS.from_str(example)
+    fs.defragment()
+    want = _defragment_blocks(fs.to_array().tolist())
+    fs.defragment()
+    assert fs.to_array().tolist() == want
+
+
+def test_defragment_matches_blocks():
+    rng = random.Random(9)
+    for _ in range(300):
+        # Long runs, split files and ids out of disk order.
+        files = [
+            Block(rng.randint(1, 12), BlockType.FILE, rng.randrange(8))
+            if rng.random() < 0.6
+            else Block(rng.randint(0, 14), BlockType.EMPTY)
+            for _ in range(rng.randint(1, 12))
+        ]
+        fs = FS(files=files)
+        want = _defragment_blocks(fs.to_array().tolist())
+        fs.defragment()
+        assert fs.to_array().tolist() == want, files
@@ -0,0 +1,119 @@
+"""Character grids read straight out of a memory-mapped input file.
+
+Solutions import this from the repo root:
+
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+    from grid import MappedGrid
+
+Rows are `memoryview`s into the mapping, so nothing is copied until a caller
+asks for it; indexing a row gives the byte value of a cell.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+from collections.abc import Iterator
+from types import TracebackType
+
+
+class MappedGrid:
+    rows: int
+    cols: int
+    # Bytes from the start of one row to the start of the next, newline included.
+    stride: int
+    # Where the first row starts, past any blank lines at the top of the file.
+    offset: int
+    buf: memoryview
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        self._file = open(path, "rb")
+        self._mmap: mmap.mmap | None = None
+        try:
+            if os.fstat(self._file.fileno()).st_size:
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                self.buf = memoryview(self._mmap)
+            else:
+                self.buf = memoryview(b"")
+            self._measure()
+        except BaseException:
+            self.close()
+            raise
+
+    def _measure(self) -> None:
+        # Scan the mapping itself rather than a view of it: a traceback that
+        # held a view would keep the mapping exported and stop close().
+        buf = self._mmap if self._mmap is not None else b""
+        # Ignore blank lines before the first row and after the last.
+        start, end = 0, len(buf)
+        while start < end and buf[start] in b"\r\n":
+            start += 1
+        while end > start and buf[end - 1] in b" \t\r\n":
+            end -= 1
+        self.offset = start
+        if start == end:
+            self.rows = self.cols = self.stride = 0
+            return
+
+        newline = buf.find(b"\n", start, end)
+        if newline == -1:
+            self.rows, self.cols, self.stride = 1, end - start, end - start + 1
+            return
+        crlf = buf[newline - 1] == ord("\r")
+        self.stride = newline + 1 - start
+        self.cols = self.stride - (2 if crlf else 1)
+        self.rows = (end - start) // self.stride + 1
+        # Every row has to end exactly one stride after the last; the widths
+        # of ragged rows can still add up to a whole number of strides.
+        row_start = start
+        while newline != -1:
+            width = newline - row_start - (buf[newline - 1] == ord("\r"))
+            if newline - row_start != self.stride - 1 or width != self.cols:
+                raise ValueError(
+                    "Expected every row to be %d wide; row %d is %d"
+                    % (self.cols, (row_start - start) // self.stride, width)
+                )
+            row_start = newline + 1
+            newline = buf.find(b"\n", row_start, end)
+        if end - row_start != self.cols:
+            raise ValueError(
+                "Expected every row to be %d wide; the last is %d"
+                % (self.cols, end - row_start)
+            )
+
+    def row(self, row: int) -> memoryview:
+        if not 0 <= row < self.rows:
+            raise IndexError("row %d out of range" % row)
+        start = self.offset + row * self.stride
+        return self.buf[start : start + self.cols]
+
+    def __getitem__(self, row: int) -> memoryview:
+        # Like a tuple of rows, so `grid[row][col]` works as it does on strings.
+        return self.row(row + self.rows if row < 0 else row)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __iter__(self) -> Iterator[memoryview]:
+        for row in range(self.rows):
+            yield self.row(row)
+
+    def close(self) -> None:
+        """Unmap the file. Rows handed out must be released first."""
+        # Views have to go before the mapping they point into can close.
+        self.buf.release()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self) -> MappedGrid:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()